@@ -1,12 +1,104 @@
 import socket
-import threading
+import selectors
 import json
+import math
+import os
+import re
 import time
-from datetime import datetime
+import heapq
+import struct
+import logging
+import sys
+from collections import deque
+
+try:
+    # Optional C encoder/decoder; stdlib json is used when it isn't installed
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # Optional linear-time DFA matcher for /search; falls back to re
+    import re2 as _search_re
+except ImportError:
+    _search_re = re
 
 ENCODING = "utf-8"
 BUFFER_SIZE = 4096
-DELIMITER = "\n"
+RX_BUFFER_SIZE = 65536  # initial size of the preallocated socket receive buffer
+HEADER = struct.Struct("!I")  # each message is a 4-byte big-endian length, then JSON
+MAX_FRAME_SIZE = 1 << 20  # larger length headers are treated as a broken server
+HAS_SENDMSG = hasattr(socket.socket, "sendmsg")  # not available on Windows
+# TCP keepalive: first probe after 30s idle, then every 10s, give up after 3
+KEEPALIVE_IDLE = 30
+KEEPALIVE_INTERVAL = 10
+KEEPALIVE_COUNT = 3
+TS_CACHE_SIZE = 1024  # formatted timestamps kept before the cache is reset
+MAX_SELECT_TIMEOUT = 3600.0  # cap on the temp-expiry wait; select() rejects huge timeouts
+
+# Diagnostics only; chat output itself stays on print
+logger = logging.getLogger("chatclient")
+
+
+def _encode_json(obj):
+    """Serialize obj straight to bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode(ENCODING)
+
+
+def _decode_json(data):
+    """Parse JSON from a bytes-like object; raises ValueError on bad input."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(bytes(data))
+
+
+def _enable_keepalive(sock):
+    """Have the kernel probe an idle connection so a dead peer is reported as an error."""
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    # The tuning options are Linux-only; elsewhere the system defaults apply
+    if hasattr(socket, "TCP_KEEPIDLE"):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, KEEPALIVE_IDLE)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, KEEPALIVE_INTERVAL)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, KEEPALIVE_COUNT)
+
+
+class History:
+    """
+    Local message history stored as parallel columns (one list per field)
+    rather than one dict per message. Position i across the columns is one
+    message; deleted is a bytearray flag per message.
+    """
+
+    __slots__ = ("ids", "directions", "peers", "texts", "timestamps",
+                 "reply_tos", "temp_untils", "deleted")
+
+    def __init__(self):
+        self.ids = []
+        self.directions = []
+        self.peers = []
+        self.texts = []
+        self.timestamps = []
+        self.reply_tos = []
+        self.temp_untils = []
+        self.deleted = bytearray()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def append(self, msg_id, direction, peer, text, timestamp, reply_to=None, temp_until=None):
+        """Record a message and return its position."""
+        idx = len(self.ids)
+        self.ids.append(msg_id)
+        self.directions.append(direction)
+        self.peers.append(peer)
+        self.texts.append(text)
+        self.timestamps.append(timestamp)
+        self.reply_tos.append(reply_to)
+        self.temp_untils.append(temp_until)
+        self.deleted.append(0)
+        return idx
 
 
 class ChatClient:
@@ -24,53 +116,78 @@ class ChatClient:
         self.sock = None
         self.client_id = None
         self.running = False
-        self.history = []  # list of dicts: {id, direction, peer, text, timestamp, reply_to, temp_until, deleted}
-        self.history_lock = threading.Lock()
+        self.history = History()
+        # Indices over history positions
+        self.by_id = {}  # message_id -> position
+        self.pending_out = {}  # peer -> deque of outgoing positions awaiting a receipt
+        # Pending temp message expiries as (temp_until, history position);
+        # the earliest one bounds the event loop's select timeout
+        self._temp_heap = []
+        self._inverted = {}  # lowercased word -> set of history positions
+        self._ts_cache = {}  # (whole second, format) -> formatted string
+        self._clock_ref = None  # server's {"wall", "mono_ns"} pair from the welcome packet
+        self.recv_buffer = bytearray(RX_BUFFER_SIZE)  # preallocated; reused for every recv_into
+        self.recv_end = 0  # recv_buffer[:recv_end] holds bytes not yet split into frames
+        self.stdin_buffer = bytearray()  # terminal input not yet split into lines
+        self.closing = False  # exit sent at end of input; waiting for the server to close
+        self.selector = None
+        # command word -> handler taking the command line's tokens
+        self._commands = {
+            "/list": self._cmd_list,
+            "/msg": self._cmd_msg,
+            "/reply": self._cmd_reply,
+            "/search": self._cmd_search,
+            "/temp": self._cmd_temp,
+            "/exit": self._cmd_exit,
+        }
 
     def connect(self):
-        """Connect to server and start listener and input threads."""
+        """Connect to server and run the event loop."""
+        self._setup_logging()
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.sock.connect((self.host, self.port))
+        # Chat packets are small; don't let Nagle hold them back
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        _enable_keepalive(self.sock)
         self.running = True
 
         # Receive welcome message
-        welcome_line = self._recv_line()
-        welcome = json.loads(welcome_line)
+        welcome = _decode_json(self._recv_frame())
         if welcome.get("type") != "welcome":
-            print("[CLIENT] Unexpected welcome packet:", welcome)
+            logger.warning("Unexpected welcome packet: %s", welcome)
             return
         self.client_id = welcome["client_id"]
+        self._clock_ref = welcome.get("clock")
         print(f"[CLIENT] Connected as {self.client_id}")
         print("[CLIENT] Currently connected clients:")
         for c in welcome.get("clients", []):
             print(f"  - {c['client_id']} at {c['address']}")
 
-        # Start listener thread
-        threading.Thread(target=self.listen_loop, daemon=True).start()
-        # Start user input loop (blocking)
-        self.input_loop()
-
-    def listen_loop(self):
-        """Listen for messages from the server."""
-        try:
-            buffer = ""
-            while self.running:
-                data = self.sock.recv(BUFFER_SIZE)
-                if not data:
-                    print("[CLIENT] Server disconnected.")
-                    break
-                buffer += data.decode(ENCODING)
-                while DELIMITER in buffer:
-                    line, buffer = buffer.split(DELIMITER, 1)
-                    if line.strip():
-                        self.handle_server_message(line)
-        except (ConnectionResetError, ConnectionAbortedError):
-            print("[CLIENT] Connection lost.")
-        finally:
-            self.running = False
+        # Serve the socket and the terminal from this thread (blocking)
+        self.event_loop()
 
-    def input_loop(self):
-        """Handle user input from the terminal."""
+    @staticmethod
+    def _setup_logging():
+        """
+        Write diagnostics to stdout like the rest of the UI. The handler is
+        synchronous so log lines stay in order with printed chat output.
+        """
+        if logger.handlers:
+            return
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("[CLIENT] %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+    def event_loop(self):
+        """
+        Multiplex server packets, terminal input and temp message expiry on one
+        thread, so history needs no locking. Relies on selecting on stdin,
+        which POSIX supports and Windows does not. epoll refuses regular files
+        and /dev/null, so redirected input falls back to select(), which
+        reports them as always readable.
+        """
         print("\n[CLIENT] Commands:")
         print("  /list                        - Show connected clients")
         print("  /msg <id> <text>             - Send message to client <id>")
@@ -79,86 +196,220 @@ class ChatClient:
         print("  /temp <id> <sec> <text>      - Send temp message that deletes locally after <sec> seconds")
         print("  /exit                        - Exit the chat\n")
 
+        self.selector = selectors.DefaultSelector()
+        try:
+            self.selector.register(sys.stdin, selectors.EVENT_READ, self._on_stdin_readable)
+        except PermissionError:
+            self.selector.close()
+            self.selector = selectors.SelectSelector()
+            self.selector.register(sys.stdin, selectors.EVENT_READ, self._on_stdin_readable)
+        self.selector.register(self.sock, selectors.EVENT_READ, self._on_server_readable)
         try:
+            # Packets that arrived together with the welcome packet
+            self._handle_buffered_frames()
+            print("> ", end="", flush=True)
             while self.running:
-                user_input = input("> ").strip()
-                if not user_input:
-                    continue
-                if user_input.startswith("/"):
-                    self.handle_command(user_input)
-                else:
-                    print("Please use a command (e.g., /msg, /list, /exit).")
-        except (EOFError, KeyboardInterrupt):
-            print("\n[CLIENT] Exiting...")
-            self.running = False
-            self.send_exit()
+                for key, _ in self.selector.select(self._next_temp_timeout()):
+                    key.data()
+                    if not self.running:
+                        break
+                self._expire_temp_messages()
+        except KeyboardInterrupt:
+            self._exit_from_terminal()
         finally:
+            self.selector.close()
             try:
                 self.sock.close()
             except OSError:
                 pass
 
-    def handle_command(self, cmd_line):
-        """Parse and execute a user command."""
-        parts = cmd_line.split(" ", 2)
-        cmd = parts[0]
-
-        if cmd == "/list":
-            self.send_list_request()
-
-        elif cmd == "/msg" and len(parts) >= 3:
-            target_id = parts[1]
-            text = parts[2]
-            self.send_chat(target_id, text)
-
-        elif cmd == "/reply":
-            # /reply <msg_id> <text>
-            msg_id_str, _, rest = cmd_line[len("/reply "):].partition(" ")
-            if not rest:
-                print("Usage: /reply <msg_id> <text>")
-                return
-            try:
-                msg_id = int(msg_id_str)
-            except ValueError:
-                print("Message ID must be an integer.")
-                return
-            text = rest
-            self.send_reply(msg_id, text)
-
-        elif cmd == "/search" and len(parts) >= 2:
-            keyword = cmd_line[len("/search "):].strip()
-            if not keyword:
-                print("Usage: /search <keyword>")
-                return
-            self.search_history(keyword)
-
-        elif cmd == "/temp":
-            # /temp <id> <sec> <text>
-            tokens = cmd_line.split(" ", 3)
-            if len(tokens) < 4:
-                print("Usage: /temp <id> <sec> <text>")
-                return
-            target_id = tokens[1]
-            try:
-                seconds = float(tokens[2])
-            except ValueError:
-                print("Seconds must be a number.")
-                return
-            text = tokens[3]
-            self.send_temp_message(target_id, text, seconds)
-
-        elif cmd == "/exit":
+    def _on_server_readable(self):
+        """Read from the server and handle complete packets."""
+        try:
+            n = self._recv_into_buffer()
+        except OSError as e:
+            # Resets, aborts and keepalive failures (ETIMEDOUT, EHOSTUNREACH, ...)
+            logger.warning("Connection lost: %s", e)
+            self.running = False
+            return
+        if not n:
+            if not self.closing:
+                logger.info("Server disconnected.")
             self.running = False
+            return
+        self._handle_buffered_frames()
+
+    def _recv_into_buffer(self):
+        """Receive into the free tail of recv_buffer, growing it when a partial frame fills it."""
+        buf = self.recv_buffer
+        if self.recv_end == len(buf):
+            buf.extend(bytes(len(buf)))
+        with memoryview(buf) as view:
+            n = self.sock.recv_into(view[self.recv_end:])
+        self.recv_end += n
+        return n
+
+    def _consume_buffer(self, end):
+        """Drop the first end bytes of recv_buffer by moving the remainder to the front."""
+        if end:
+            remaining = self.recv_end - end
+            with memoryview(self.recv_buffer) as view:
+                view[:remaining] = view[end:self.recv_end]
+            self.recv_end = remaining
+
+    def _handle_buffered_frames(self):
+        """Dispatch every complete frame in recv_buffer."""
+        buf = self.recv_buffer
+        consumed = 0
+        try:
+            with memoryview(buf) as view:
+                bounds = self._frame_bounds(consumed)
+                while bounds:
+                    start, end = bounds
+                    with view[start:end] as frame:
+                        self.handle_server_message(frame)
+                    consumed = end
+                    bounds = self._frame_bounds(consumed)
+        except ConnectionError as e:
+            logger.warning("%s", e)
+            self.running = False
+            return
+        self._consume_buffer(consumed)
+
+    def _frame_bounds(self, offset):
+        """Return (start, end) of the payload framed at offset in recv_buffer, or None if incomplete."""
+        buf = self.recv_buffer
+        if self.recv_end - offset < HEADER.size:
+            return None
+        (size,) = HEADER.unpack_from(buf, offset)
+        if size > MAX_FRAME_SIZE:
+            raise ConnectionError(f"Oversized frame ({size} bytes) from server.")
+        start = offset + HEADER.size
+        end = start + size
+        if end > self.recv_end:
+            return None
+        return start, end
+
+    def _on_stdin_readable(self):
+        """Handle complete lines typed at the terminal."""
+        # Read the fd directly: a buffered readline() could hold extra lines
+        # that the selector would never report as readable again
+        data = os.read(sys.stdin.fileno(), BUFFER_SIZE)
+        if not data:
+            self._on_stdin_eof()
+            return
+        buf = self.stdin_buffer
+        buf.extend(data)
+        nl = buf.find(b"\n")
+        while nl != -1 and self.running:
+            line = bytes(buf[:nl])
+            del buf[:nl + 1]
+            self._handle_input_line(line)
+            nl = buf.find(b"\n")
+
+    def _handle_input_line(self, line):
+        """Run one line of terminal input and re-print the prompt."""
+        user_input = line.decode(sys.stdin.encoding or ENCODING, errors="replace").strip()
+        if user_input.startswith("/"):
+            self.handle_command(user_input)
+        elif user_input:
+            print("Please use a command (e.g., /msg, /list, /exit).")
+        if self.running:
+            print("> ", end="", flush=True)
+
+    def _on_stdin_eof(self):
+        """
+        Run a final line that had no trailing newline, then send exit and keep
+        reading until the server closes, so replies to the last commands still
+        get printed.
+        """
+        self.selector.unregister(sys.stdin)
+        if self.stdin_buffer and self.running:
+            line = bytes(self.stdin_buffer)
+            self.stdin_buffer.clear()
+            self._handle_input_line(line)
+        if self.running:
+            print("\n[CLIENT] Exiting...")
+            self.closing = True
             self.send_exit()
 
-        else:
+    def _exit_from_terminal(self):
+        """Leave the chat on Ctrl-C."""
+        print("\n[CLIENT] Exiting...")
+        self.running = False
+        self.send_exit()
+
+    def handle_command(self, cmd_line):
+        """Parse and execute a user command."""
+        # One split serves every command: /temp needs four fields, the
+        # others rejoin whatever follows their fixed arguments
+        tokens = cmd_line.split(" ", 3)
+        handler = self._commands.get(tokens[0])
+        if handler is None:
+            print("Unknown or malformed command.")
+            return
+        handler(tokens)
+
+    def _cmd_list(self, tokens):
+        self.send_list_request()
+
+    def _cmd_msg(self, tokens):
+        # /msg <id> <text>
+        if len(tokens) < 3:
+            print("Unknown or malformed command.")
+            return
+        self.send_chat(tokens[1], " ".join(tokens[2:]))
+
+    def _cmd_reply(self, tokens):
+        # /reply <msg_id> <text>
+        text = " ".join(tokens[2:])
+        if not text:
+            print("Usage: /reply <msg_id> <text>")
+            return
+        try:
+            msg_id = int(tokens[1])
+        except ValueError:
+            print("Message ID must be an integer.")
+            return
+        self.send_reply(msg_id, text)
+
+    def _cmd_search(self, tokens):
+        # /search <keyword>
+        if len(tokens) < 2:
             print("Unknown or malformed command.")
+            return
+        keyword = " ".join(tokens[1:]).strip()
+        if not keyword:
+            print("Usage: /search <keyword>")
+            return
+        self.search_history(keyword)
+
+    def _cmd_temp(self, tokens):
+        # /temp <id> <sec> <text>
+        if len(tokens) < 4:
+            print("Usage: /temp <id> <sec> <text>")
+            return
+        try:
+            seconds = float(tokens[2])
+        except ValueError:
+            print("Seconds must be a number.")
+            return
+        if not math.isfinite(seconds):
+            # inf/nan would never expire and would break the expiry heap's ordering
+            print("Seconds must be a finite number.")
+            return
+        self.send_temp_message(tokens[1], tokens[3], seconds)
+
+    def _cmd_exit(self, tokens):
+        self.running = False
+        self.send_exit()
 
     def send_list_request(self):
         packet = {"type": "list"}
         self._send_json(packet)
 
     def send_chat(self, target_id, text, reply_to=None, temp_until=None):
+        """Send a chat message and record it; returns its position in history."""
         packet = {
             "type": "chat",
             "to": target_id,
@@ -166,56 +417,41 @@ class ChatClient:
             "reply_to": reply_to,
         }
         self._send_json(packet)
-        # Locally record outgoing message with temporary placeholder ID, updated on receipt
-        with self.history_lock:
-            entry = {
-                "id": None,  # will be updated when receipt arrives
-                "direction": "out",
-                "peer": target_id,
-                "text": text,
-                "timestamp": time.time(),
-                "reply_to": reply_to,
-                "temp_until": temp_until,
-                "deleted": False,
-            }
-            self.history.append(entry)
+        # Locally record outgoing message with placeholder ID None, updated on receipt
+        idx = self._append_history(None, "out", target_id, text, time.time(), reply_to, temp_until)
+        self.pending_out.setdefault(target_id, deque()).append(idx)
+        return idx
 
     def send_reply(self, msg_id, text):
         """Reply to a previous message by ID."""
-        with self.history_lock:
-            target_msg = next((m for m in self.history if m["id"] == msg_id), None)
-        if not target_msg:
+        idx = self.by_id.get(msg_id)
+        if idx is None:
             print(f"[CLIENT] No message with ID {msg_id} in history.")
             return
-        peer = target_msg["peer"]
+        peer = self.history.peers[idx]
         self.send_chat(peer, text, reply_to=msg_id)
 
     def send_temp_message(self, target_id, text, seconds):
         """Send a temporary message that is later 'deleted' locally."""
         temp_until = time.time() + seconds
-        self.send_chat(target_id, text, reply_to=None, temp_until=temp_until)
-        # spawn a thread to mark deletion after timeout
-        threading.Thread(
-            target=self._temp_cleanup_worker,
-            args=(temp_until, text),
-            daemon=True
-        ).start()
-
-    def _temp_cleanup_worker(self, temp_until, text):
-        """Mark temp message as deleted after timeout."""
-        remaining = temp_until - time.time()
-        if remaining > 0:
-            time.sleep(remaining)
-        with self.history_lock:
-            for m in self.history:
-                if (
-                    m["text"] == text
-                    and m["temp_until"] == temp_until
-                    and not m["deleted"]
-                ):
-                    m["deleted"] = True
-                    break
-        print("[CLIENT] (Temp) A message has expired and was removed from local history.")
+        idx = self.send_chat(target_id, text, reply_to=None, temp_until=temp_until)
+        # the event loop marks it deleted once temp_until passes
+        heapq.heappush(self._temp_heap, (temp_until, idx))
+
+    def _next_temp_timeout(self):
+        """Seconds until the earliest temp message expires, or None if none are pending."""
+        if not self._temp_heap:
+            return None
+        return min(MAX_SELECT_TIMEOUT, max(0.0, self._temp_heap[0][0] - time.time()))
+
+    def _expire_temp_messages(self):
+        """Mark temp messages whose expiry time has passed as deleted."""
+        heap = self._temp_heap
+        now = time.time()
+        while heap and heap[0][0] <= now:
+            _, idx = heapq.heappop(heap)
+            self.history.deleted[idx] = 1
+            print("[CLIENT] (Temp) A message has expired and was removed from local history.")
 
     def send_exit(self):
         packet = {"type": "exit"}
@@ -227,9 +463,9 @@ class ChatClient:
     def handle_server_message(self, raw_line):
         """Process a JSON packet from the server."""
         try:
-            msg = json.loads(raw_line)
-        except json.JSONDecodeError:
-            print("[CLIENT] Failed to decode server message:", raw_line)
+            msg = _decode_json(raw_line)
+        except ValueError:
+            logger.warning("Failed to decode server message: %r", bytes(raw_line))
             return
 
         mtype = msg.get("type")
@@ -244,28 +480,19 @@ class ChatClient:
         elif mtype == "error":
             print(f"[ERROR] {msg.get('text')}")
         else:
-            print("[CLIENT] Unknown packet type:", msg)
+            logger.warning("Unknown packet type: %s", msg)
 
     def handle_chat_message(self, msg):
         mid = msg.get("message_id")
         sender = msg.get("from")
         text = msg.get("text")
-        ts = msg.get("timestamp")
+        ts = self._server_time(msg.get("timestamp_ns"))
         reply_to = msg.get("reply_to")
-        ts_str = datetime.fromtimestamp(ts).strftime("%H:%M:%S") if ts else "?"
-
-        with self.history_lock:
-            entry = {
-                "id": mid,
-                "direction": "in",
-                "peer": sender,
-                "text": text,
-                "timestamp": ts,
-                "reply_to": reply_to,
-                "temp_until": None,
-                "deleted": False,
-            }
-            self.history.append(entry)
+        ts_str = self._format_ts(ts)
+
+        idx = self._append_history(mid, "in", sender, text, ts, reply_to)
+        if mid is not None:
+            self.by_id[mid] = idx
 
         if reply_to:
             print(f"[{ts_str}] {sender} (reply to #{reply_to}): {text}  [#{mid}]")
@@ -275,20 +502,16 @@ class ChatClient:
     def handle_receipt(self, msg):
         mid = msg.get("message_id")
         target = msg.get("to")
-        ts = msg.get("timestamp")
-        ts_str = datetime.fromtimestamp(ts).strftime("%H:%M:%S") if ts else "?"
-
-        # update outgoing message entry with message id
-        with self.history_lock:
-            for m in self.history:
-                if (
-                    m["direction"] == "out"
-                    and m["id"] is None
-                    and m["peer"] == target
-                    and not m["deleted"]
-                ):
-                    m["id"] = mid
-                    break
+        ts = self._server_time(msg.get("timestamp_ns"))
+        ts_str = self._format_ts(ts)
+
+        # update outgoing message with its id; the server answers in send
+        # order, so the oldest pending message for this peer is the match
+        pending = self.pending_out.get(target)
+        if pending:
+            idx = pending.popleft()
+            self.history.ids[idx] = mid
+            self.by_id[mid] = idx
 
         print(f"[RECEIPT {ts_str}] Message #{mid} delivered to {target}")
 
@@ -297,42 +520,98 @@ class ChatClient:
         for c in msg.get("clients", []):
             print(f"  - {c['client_id']} at {c['address']}")
 
+    def _append_history(self, msg_id, direction, peer, text, timestamp, reply_to=None, temp_until=None):
+        """Append a message, index its words and return its position."""
+        if not isinstance(text, str):
+            # Only index and search real strings, whatever a peer put in "text"
+            text = "" if text is None else str(text)
+        idx = self.history.append(msg_id, direction, peer, text, timestamp, reply_to, temp_until)
+        for word in (text or "").lower().split():
+            self._inverted.setdefault(word, set()).add(idx)
+        return idx
+
+    def _search_candidates(self, keyword_lower):
+        """
+        Return history positions that may contain keyword_lower.
+        Every whitespace-separated piece of a substring match lies inside a
+        single word of the text, so intersecting per-piece postings can't miss.
+        """
+        candidates = None
+        for piece in keyword_lower.split():
+            postings = set()
+            for word, positions in self._inverted.items():
+                if piece in word:
+                    postings |= positions
+            candidates = postings if candidates is None else candidates & postings
+            if not candidates:
+                return []
+        return sorted(candidates)
+
     def search_history(self, keyword):
         """Search local history for keyword and print matches."""
         keyword_lower = keyword.lower()
         print(f"[CLIENT] Searching for '{keyword}'...")
-        with self.history_lock:
-            matches = [
-                m for m in self.history
-                if (not m["deleted"] and keyword_lower in m["text"].lower())
-            ]
+        # One case-insensitive pattern instead of lowercasing every candidate
+        pattern = _search_re.compile("(?i)" + re.escape(keyword))
+        history = self.history
+        texts = history.texts
+        deleted = history.deleted
+        matches = [
+            idx for idx in self._search_candidates(keyword_lower)
+            if not deleted[idx] and pattern.search(texts[idx])
+        ]
         if not matches:
             print("[CLIENT] No matches found.")
             return
-        for m in matches:
-            direction = "From" if m["direction"] == "in" else "To"
-            peer = m["peer"]
-            mid = m["id"]
-            ts = m["timestamp"]
-            ts_str = (
-                datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
-                if ts else "?"
-            )
-            print(f"  [#{mid or '?'}] {direction} {peer} at {ts_str}: {m['text']}")
+        for idx in matches:
+            direction = "From" if history.directions[idx] == "in" else "To"
+            peer = history.peers[idx]
+            mid = history.ids[idx]
+            ts_str = self._format_ts(history.timestamps[idx], "%Y-%m-%d %H:%M:%S")
+            print(f"  [#{mid or '?'}] {direction} {peer} at {ts_str}: {texts[idx]}")
+
+    def _server_time(self, ns):
+        """Convert a server monotonic timestamp_ns to wall-clock seconds (None if unknown)."""
+        ref = self._clock_ref
+        if ns is None or ref is None:
+            return None
+        return ref["wall"] + (ns - ref["mono_ns"]) / 1e9
+
+    def _format_ts(self, ts, fmt="%H:%M:%S"):
+        """Format a timestamp to whole seconds, reusing results within the same second."""
+        if not ts:
+            return "?"
+        key = (int(ts), fmt)
+        s = self._ts_cache.get(key)
+        if s is None:
+            if len(self._ts_cache) >= TS_CACHE_SIZE:
+                self._ts_cache.clear()
+            s = time.strftime(fmt, time.localtime(key[0]))
+            self._ts_cache[key] = s
+        return s
 
     def _send_json(self, obj):
-        data = json.dumps(obj) + DELIMITER
-        self.sock.sendall(data.encode(ENCODING))
-
-    def _recv_line(self):
-        buffer = ""
-        while DELIMITER not in buffer:
-            data = self.sock.recv(BUFFER_SIZE)
-            if not data:
+        payload = _encode_json(obj)
+        header = HEADER.pack(len(payload))
+        if not HAS_SENDMSG:
+            self.sock.sendall(header + payload)
+            return
+        # Gather header and payload in one call instead of concatenating
+        sent = self.sock.sendmsg([header, payload])
+        if sent < len(header) + len(payload):
+            self.sock.sendall((header + payload)[sent:])
+
+    def _recv_frame(self):
+        bounds = self._frame_bounds(0)
+        while bounds is None:
+            if not self._recv_into_buffer():
                 raise ConnectionError("Server closed connection during welcome.")
-            buffer += data.decode(ENCODING)
-        line, _ = buffer.split(DELIMITER, 1)
-        return line
+            bounds = self._frame_bounds(0)
+        start, end = bounds
+        payload = bytes(self.recv_buffer[start:end])
+        # Anything after this frame stays buffered for the event loop
+        self._consume_buffer(end)
+        return payload
 
 
 if __name__ == "__main__":
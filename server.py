@@ -1,11 +1,83 @@
 import socket
-import threading
+import selectors
 import json
 import time
+import itertools
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import queue
+import signal
+import struct
+import sys
+from collections import deque
+
+try:
+    # Optional C encoder/decoder; stdlib json is used when it isn't installed
+    import orjson
+except ImportError:
+    orjson = None
 
 ENCODING = "utf-8"
-BUFFER_SIZE = 4096
-DELIMITER = "\n"  # messages separated by newline
+RX_BUFFER_SIZE = 65536  # initial size of each connection's preallocated receive buffer
+HEADER = struct.Struct("!I")  # each message is a 4-byte big-endian length, then JSON
+MAX_FRAME_SIZE = 1 << 20  # larger length headers are treated as a broken peer
+HAS_SENDMSG = hasattr(socket.socket, "sendmsg")  # not available on Windows
+IOV_BATCH = 64  # buffers gathered per sendmsg call, well under IOV_MAX
+# TCP keepalive: first probe after 30s idle, then every 10s, give up after 3
+KEEPALIVE_IDLE = 30
+KEEPALIVE_INTERVAL = 10
+KEEPALIVE_COUNT = 3
+ACCEPT_BATCH = 64  # connections accepted per listening-socket wakeup
+WORKER_STOP_GRACE = 1.0  # seconds workers get to stop on their own after a Ctrl-C
+
+logger = logging.getLogger("chatserver")
+
+
+def _encode_json(obj):
+    """Serialize obj straight to bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode(ENCODING)
+
+
+def _decode_json(data):
+    """Parse JSON from a bytes-like object; raises ValueError on bad input."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(bytes(data))
+
+
+def _enable_keepalive(sock):
+    """Have the kernel probe an idle connection so a dead peer is reported as an error."""
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    # The tuning options are Linux-only; elsewhere the system defaults apply
+    if hasattr(socket, "TCP_KEEPIDLE"):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, KEEPALIVE_IDLE)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, KEEPALIVE_INTERVAL)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, KEEPALIVE_COUNT)
+
+
+class ClientState:
+    """
+    Per-connection state owned by the reactor:
+    - rx is a preallocated receive buffer; rx[:rx_end] holds bytes not yet parsed into frames
+    - out_queue holds encoded packets waiting for the socket to become writable
+    - peer_index is set instead of client_id for links to other worker processes
+    """
+
+    def __init__(self, client_id, sock, address, peer_index=None):
+        self.client_id = client_id
+        self.peer_index = peer_index
+        self.socket = sock
+        self.address = address
+        self.name = client_id  # for now, name == ID
+        self.rx = bytearray(RX_BUFFER_SIZE)
+        self.rx_end = 0
+        self.out_queue = deque()
+        self.events = selectors.EVENT_READ
+        self.closed = False
 
 
 class ChatServer:
@@ -15,106 +87,361 @@ class ChatServer:
     - Tracks connected clients
     - Routes direct messages between clients
     - Sends delivery receipts back to senders
+
+    All sockets are multiplexed by a single selector loop, so client state
+    is only ever touched from the reactor thread.
+
+    With workers > 1, start() forks that many worker processes. Each binds
+    its own SO_REUSEPORT listening socket, so the kernel spreads incoming
+    connections across them. Workers are linked pairwise by UNIX socket
+    pairs; over those links they announce joins and leaves, and relay chats
+    to clients that live on another worker.
     """
 
-    def __init__(self, host="127.0.0.1", port=5555):
+    def __init__(self, host="127.0.0.1", port=5555, workers=1):
+        if workers > 1 and not hasattr(socket, "SO_REUSEPORT"):
+            raise ValueError("workers > 1 requires SO_REUSEPORT support")
         self.host = host
         self.port = port
+        self.workers = workers
+        self.worker_index = None  # set inside worker processes
         self.server_socket = None
-        self.clients = {}  # client_id -> {"socket": sock, "address": addr, "name": name}
-        self.next_client_id = 1
-        self.lock = threading.Lock()
+        self.selector = None
+        self.clients = {}  # client_id -> ClientState
+        self.remote_clients = {}  # client_id -> {"worker": index, "address": str} for other workers
+        self.peers = {}  # worker index -> ClientState of the link to that worker
+        self._pending_flush = {}  # ClientStates with output queued this tick (insertion-ordered)
+        self._log_handler = None
+        self._log_listener = None
         self.running = False
-        self.message_counter = 1
+        # Packets carry monotonic timestamp_ns; clients turn them into wall
+        # time with this one reference pair, sent in the welcome packet.
+        # Taken before any fork, and CLOCK_MONOTONIC is system-wide, so
+        # every worker shares it.
+        self.clock_ref = {"wall": time.time(), "mono_ns": time.monotonic_ns()}
+        # Client and message IDs; workers take interleaved values so they never collide
+        self._client_ids = itertools.count(1)
+        self._msg_ids = itertools.count(1)
+        # Cached client list and encoded client_list frame; reset when clients changes
+        self._snapshot = None
+        self._client_list_frame = None
 
     def start(self):
-        """Start the TCP server and begin accepting clients."""
+        """Start the TCP server and run the event loop (in worker processes if workers > 1)."""
+        if self.workers > 1:
+            self._start_workers()
+            return
+        self._serve()
+
+    def _start_workers(self):
+        """Fork the worker processes, link every pair of them, and wait for them to exit."""
+        # fork, so each worker inherits its ends of the socket pairs directly
+        ctx = multiprocessing.get_context("fork")
+        links = {}  # (i, j) -> worker i's end of the i<->j link
+        for i in range(self.workers):
+            for j in range(i + 1, self.workers):
+                links[(i, j)], links[(j, i)] = socket.socketpair()
+
+        procs = []
+        for i in range(self.workers):
+            proc = ctx.Process(target=self._run_worker, args=(i, links), name=f"worker-{i}", daemon=True)
+            proc.start()
+            procs.append(proc)
+        for sock in links.values():
+            sock.close()
+
+        self._start_logging()
+        logger.info("Started %d workers on %s:%s", self.workers, self.host, self.port)
+        try:
+            for proc in procs:
+                proc.join()
+        except KeyboardInterrupt:
+            # A terminal Ctrl-C already reached the workers, so give them a
+            # moment first; only forward it to workers still running (i.e.
+            # the interrupt was aimed at this process alone)
+            logger.info("KeyboardInterrupt received, stopping workers.")
+            deadline = time.monotonic() + WORKER_STOP_GRACE
+            for proc in procs:
+                proc.join(timeout=max(0.0, deadline - time.monotonic()))
+            for proc in procs:
+                if proc.is_alive():
+                    os.kill(proc.pid, signal.SIGINT)
+            for proc in procs:
+                proc.join(timeout=5)
+                if proc.is_alive():
+                    proc.terminate()
+        finally:
+            self._stop_logging()
+
+    def _run_worker(self, index, links):
+        """Worker process body: keep this worker's links, then serve."""
+        self.worker_index = index
+        self._client_ids = itertools.count(index + 1, self.workers)
+        self._msg_ids = itertools.count(index + 1, self.workers)
+        for (i, j), sock in links.items():
+            if i == index:
+                self.peers[j] = ClientState(None, sock, None, peer_index=j)
+            else:
+                sock.close()
+        self._serve()
+
+    def _serve(self):
+        """Bind the listening socket and run the event loop until shutdown."""
+        self._start_logging()
         self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         # Allow quick restart
         self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if self.workers > 1:
+            # Every worker binds the same port; the kernel balances accepts
+            self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        # Chat packets are small; don't let Nagle hold them back
+        self.server_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
         self.server_socket.bind((self.host, self.port))
-        self.server_socket.listen(5)
+        self.server_socket.listen(socket.SOMAXCONN)
+        self.server_socket.setblocking(False)
+
+        self.selector = selectors.DefaultSelector()
+        # Listening socket carries no state; client and peer sockets carry their ClientState
+        self.selector.register(self.server_socket, selectors.EVENT_READ, None)
+        for peer in self.peers.values():
+            peer.socket.setblocking(False)
+            self.selector.register(peer.socket, peer.events, peer)
 
         self.running = True
-        print(f"[SERVER] ChatServer listening on {self.host}:{self.port}")
+        logger.info("ChatServer listening on %s:%s", self.host, self.port)
 
         try:
             while self.running:
-                conn, addr = self.server_socket.accept()
-                threading.Thread(
-                    target=self.handle_new_client,
-                    args=(conn, addr),
-                    daemon=True
-                ).start()
+                for key, mask in self.selector.select():
+                    state = key.data
+                    if state is None:
+                        self._on_accept()
+                        continue
+                    try:
+                        if mask & selectors.EVENT_READ and not state.closed:
+                            self._on_readable(state)
+                        if mask & selectors.EVENT_WRITE and not state.closed:
+                            self._on_writable(state)
+                    except Exception:
+                        # A bug triggered by one connection must only cost that connection
+                        logger.exception("Error handling %s; dropping it",
+                                         state.client_id or f"worker {state.peer_index}")
+                        self._connection_lost(state)
+                self._flush_pending()
         except KeyboardInterrupt:
-            print("[SERVER] KeyboardInterrupt received, shutting down.")
+            if self.worker_index is not None:
+                # A repeated Ctrl-C must not interrupt shutdown halfway
+                signal.signal(signal.SIGINT, signal.SIG_IGN)
+            logger.info("KeyboardInterrupt received, shutting down.")
         finally:
             self.shutdown()
 
     def shutdown(self):
         """Stop the server and close all sockets."""
         self.running = False
-        print("[SERVER] Shutting down...")
-        with self.lock:
-            for cid, info in list(self.clients.items()):
-                try:
-                    info["socket"].close()
-                except OSError:
-                    pass
-            self.clients.clear()
+        logger.info("Shutting down...")
+        for state in list(self.clients.values()) + list(self.peers.values()):
+            state.closed = True
+            try:
+                state.socket.close()
+            except OSError:
+                pass
+        self.clients.clear()
+        self.peers.clear()
         if self.server_socket:
             try:
                 self.server_socket.close()
             except OSError:
                 pass
-        print("[SERVER] Shutdown complete.")
+        if self.selector:
+            self.selector.close()
+        logger.info("Shutdown complete.")
+        self._stop_logging()
+
+    def _start_logging(self):
+        """
+        Send log records through a queue to a background writer thread, so the
+        reactor never blocks on stdout. Skipped if the embedding application
+        already configured handlers for this logger.
+        """
+        if logger.handlers:
+            return
+        log_queue = queue.SimpleQueue()
+        stream_handler = logging.StreamHandler(sys.stdout)
+        prefix = "[SERVER]" if self.worker_index is None else f"[SERVER {self.worker_index}]"
+        stream_handler.setFormatter(logging.Formatter(prefix + " %(message)s"))
+        self._log_handler = logging.handlers.QueueHandler(log_queue)
+        self._log_listener = logging.handlers.QueueListener(log_queue, stream_handler)
+        logger.addHandler(self._log_handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        self._log_listener.start()
+
+    def _stop_logging(self):
+        """Flush queued log records and detach the queue handler."""
+        if self._log_listener is None:
+            return
+        logger.removeHandler(self._log_handler)
+        self._log_listener.stop()
+        self._log_handler = None
+        self._log_listener = None
+
+    def _on_accept(self):
+        """Accept pending connections on the listening socket, several per wakeup."""
+        for _ in range(ACCEPT_BATCH):
+            try:
+                conn, addr = self.server_socket.accept()
+            except BlockingIOError:
+                return
+            except OSError as e:
+                # e.g. EMFILE; leave the rest of the backlog for the next wakeup
+                logger.warning("accept failed: %s", e)
+                return
+            self.handle_new_client(conn, addr)
 
     def handle_new_client(self, conn, addr):
-        """Assign client ID, send welcome info, then handle messages."""
-        with self.lock:
-            client_id = f"C{self.next_client_id:03d}"
-            self.next_client_id += 1
-            self.clients[client_id] = {
-                "socket": conn,
-                "address": addr,
-                "name": client_id  # for now, name == ID
-            }
-        print(f"[SERVER] New client {client_id} connected from {addr}")
+        """Assign client ID, register the socket and send welcome info."""
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        _enable_keepalive(conn)
+        conn.setblocking(False)
 
-        try:
-            # Send welcome packet with this client's ID and current client list
-            welcome_msg = {
-                "type": "welcome",
-                "client_id": client_id,
-                "clients": self._client_list_snapshot()
-            }
-            self.send_json(conn, welcome_msg)
+        client_id = f"C{next(self._client_ids):03d}"
+        state = ClientState(client_id, conn, addr)
+        self.clients[client_id] = state
+        self._invalidate_snapshot()
+        self.selector.register(conn, state.events, state)
+        logger.info("New client %s connected from %s", client_id, addr)
 
-            # Notify others that a new client joined
-            self.broadcast_info(f"{client_id} joined the chat.", exclude_id=client_id)
+        # Send welcome packet with this client's ID and current client list
+        welcome_msg = {
+            "type": "welcome",
+            "client_id": client_id,
+            "clients": self._client_list_snapshot(),
+            "clock": self.clock_ref,
+        }
+        self.send_json(state, welcome_msg)
+
+        # Notify others that a new client joined
+        self.broadcast_info(f"{client_id} joined the chat.", exclude_id=client_id)
+        self._notify_peers({"type": "peer_join", "client_id": client_id, "address": str(addr)})
+
+    def _on_readable(self, state):
+        """Drain available data from a client or peer and handle complete frames."""
+        buf = state.rx
+        if state.rx_end == len(buf):
+            # A partial frame fills the buffer; grow it (frames are capped at MAX_FRAME_SIZE)
+            buf.extend(bytes(len(buf)))
+        try:
+            with memoryview(buf) as view:
+                n = state.socket.recv_into(view[state.rx_end:])
+        except BlockingIOError:
+            return
+        except OSError as e:
+            # Resets, aborts and keepalive failures (ETIMEDOUT, EHOSTUNREACH, ...)
+            if state.peer_index is None:
+                logger.info("Connection lost with %s: %s", state.client_id, e)
+            self._connection_lost(state)
+            return
+        if not n:
+            self._connection_lost(state)
+            return
 
-            # Handle messages from this client
-            buffer = ""
-            while True:
-                data = conn.recv(BUFFER_SIZE)
-                if not data:
+        state.rx_end += n
+        filled = state.rx_end
+        consumed = 0
+        oversized = False
+        # Frames are parsed straight out of buf through memoryviews; any
+        # trailing partial frame is moved to the front once at the end
+        with memoryview(buf) as view:
+            while not state.closed and filled - consumed >= HEADER.size:
+                (size,) = HEADER.unpack_from(buf, consumed)
+                if size > MAX_FRAME_SIZE:
+                    logger.warning("Oversized frame (%d bytes) from %s", size,
+                                   state.client_id or f"worker {state.peer_index}")
+                    oversized = True
                     break
-                buffer += data.decode(ENCODING)
-                while DELIMITER in buffer:
-                    line, buffer = buffer.split(DELIMITER, 1)
-                    if line.strip():
-                        self.handle_client_message(client_id, line)
-        except (ConnectionResetError, ConnectionAbortedError):
-            print(f"[SERVER] Connection lost with {client_id}")
-        finally:
-            self.remove_client(client_id)
+                start = consumed + HEADER.size
+                end = start + size
+                if end > filled:
+                    break
+                with view[start:end] as frame:
+                    if state.peer_index is None:
+                        self.handle_client_message(state.client_id, frame)
+                    else:
+                        self.handle_peer_message(state, frame)
+                consumed = end
+            if consumed and not oversized:
+                # Compact in place so the buffer keeps its size
+                view[:filled - consumed] = view[consumed:filled]
+        if oversized:
+            self._connection_lost(state)
+            return
+        state.rx_end = filled - consumed
+
+    def _connection_lost(self, state):
+        """Tear down a client connection or a worker link that failed or closed."""
+        if state.peer_index is None:
+            self.remove_client(state.client_id)
+        else:
+            self._drop_peer(state)
+
+    def _flush_pending(self):
+        """
+        Flush every socket that had packets queued during this tick, so all of
+        a tick's packets for one client leave in a single sendmsg. Write
+        interest is only armed for sockets the kernel couldn't fully accept.
+        """
+        pending = self._pending_flush
+        while pending:
+            state = next(iter(pending))
+            del pending[state]
+            if state.closed or state.events & selectors.EVENT_WRITE:
+                continue
+            if not self._flush(state) and not state.closed:
+                state.events = selectors.EVENT_READ | selectors.EVENT_WRITE
+                self.selector.modify(state.socket, state.events, state)
+
+    def _on_writable(self, state):
+        """Flush queued packets; drop write interest once the queue is empty."""
+        if not self._flush(state):
+            return
+        if state.events & selectors.EVENT_WRITE:
+            state.events = selectors.EVENT_READ
+            self.selector.modify(state.socket, state.events, state)
+
+    def _flush(self, state):
+        """Send as much of the out queue as the socket accepts. Returns True when drained."""
+        out_queue = state.out_queue
+        while out_queue:
+            try:
+                if HAS_SENDMSG:
+                    # Gather queued buffers into one syscall, no joining copy
+                    sent = state.socket.sendmsg(list(itertools.islice(out_queue, IOV_BATCH)))
+                else:
+                    sent = state.socket.send(out_queue[0])
+            except BlockingIOError:
+                return False
+            except OSError:
+                self._connection_lost(state)
+                return False
+            while sent:
+                head = out_queue[0]
+                if sent < len(head):
+                    out_queue[0] = memoryview(head)[sent:]
+                    return False
+                sent -= len(head)
+                out_queue.popleft()
+        return True
 
     def handle_client_message(self, client_id, raw_line):
         """Parse and respond to a client's JSON message."""
         try:
-            msg = json.loads(raw_line)
-        except json.JSONDecodeError:
-            print(f"[SERVER] Failed to decode message from {client_id}: {raw_line}")
+            msg = _decode_json(raw_line)
+        except ValueError:
+            logger.warning("Failed to decode message from %s: %r", client_id, bytes(raw_line))
+            return
+        if not isinstance(msg, dict):
+            self.send_error(client_id, "Malformed packet: expected a JSON object.")
             return
 
         msg_type = msg.get("type")
@@ -133,20 +460,22 @@ class ChatServer:
         target_id = msg.get("to")
         text = msg.get("text", "")
         reply_to = msg.get("reply_to")
-        timestamp = time.time()
-
-        with self.lock:
-            target_info = self.clients.get(target_id)
-            sender_info = self.clients.get(sender_id)
+        timestamp_ns = time.monotonic_ns()
+        if not isinstance(target_id, str):
+            self.send_error(sender_id, "Malformed chat packet: 'to' must be a client ID.")
+            return
+        if not isinstance(text, str):
+            self.send_error(sender_id, "Malformed chat packet: 'text' must be a string.")
+            return
 
-        if not target_info:
+        target_state = self.clients.get(target_id)
+        remote = None if target_state else self.remote_clients.get(target_id)
+        if not target_state and not remote:
             self.send_error(sender_id, f"Target client {target_id} not found.")
             return
 
         # Assign a server-side message ID
-        with self.lock:
-            message_id = self.message_counter
-            self.message_counter += 1
+        message_id = next(self._msg_ids)
 
         chat_packet = {
             "type": "chat",
@@ -154,103 +483,207 @@ class ChatServer:
             "from": sender_id,
             "to": target_id,
             "text": text,
-            "timestamp": timestamp,
+            "timestamp_ns": timestamp_ns,
             "reply_to": reply_to,
         }
-        self.send_json(target_info["socket"], chat_packet)
+        if remote:
+            # The owning worker delivers it and relays the receipt back
+            self.send_json(self.peers[remote["worker"]], {"type": "relay_chat", "packet": chat_packet})
+            return
+        self.send_json(target_state, chat_packet)
 
         # Send receipt back to sender
-        receipt_packet = {
+        self.send_to_client_id(sender_id, self._receipt_packet(message_id, target_id))
+
+    @staticmethod
+    def _receipt_packet(message_id, target_id):
+        return {
             "type": "receipt",
             "message_id": message_id,
             "to": target_id,
             "status": "delivered",
-            "timestamp": time.time(),
+            "timestamp_ns": time.monotonic_ns(),
         }
-        if sender_info:
-            self.send_json(sender_info["socket"], receipt_packet)
+
+    @staticmethod
+    def _error_packet(text):
+        return {
+            "type": "error",
+            "text": text,
+            "timestamp_ns": time.monotonic_ns(),
+        }
+
+    def handle_peer_message(self, peer, raw):
+        """Apply a registry update or relayed packet from another worker."""
+        try:
+            msg = _decode_json(raw)
+        except ValueError:
+            logger.warning("Failed to decode message from worker %d", peer.peer_index)
+            return
+
+        msg_type = msg.get("type")
+        if msg_type == "peer_join":
+            client_id = msg["client_id"]
+            self.remote_clients[client_id] = {"worker": peer.peer_index, "address": msg["address"]}
+            self._invalidate_snapshot()
+            self.broadcast_info(f"{client_id} joined the chat.")
+        elif msg_type == "peer_leave":
+            client_id = msg["client_id"]
+            if self.remote_clients.pop(client_id, None):
+                self._invalidate_snapshot()
+                self.broadcast_info(f"{client_id} left the chat.")
+        elif msg_type == "relay_chat":
+            packet = msg["packet"]
+            target_state = self.clients.get(packet["to"])
+            if target_state:
+                self.send_json(target_state, packet)
+                reply = self._receipt_packet(packet["message_id"], packet["to"])
+            else:
+                # Left after the sender's worker looked it up
+                reply = self._error_packet(f"Target client {packet['to']} not found.")
+            self.send_json(peer, {"type": "relay", "to": packet["from"], "packet": reply})
+        elif msg_type == "relay":
+            self.send_to_client_id(msg["to"], msg["packet"])
+
+    def _notify_peers(self, obj):
+        """Queue one encoded packet to every other worker."""
+        if not self.peers:
+            return
+        frame = self._encode_frame(obj)
+        for peer in self.peers.values():
+            self._queue_frame(peer, frame)
+
+    def _drop_peer(self, peer):
+        """Forget a worker whose link closed, along with the clients it owned."""
+        if self.peers.pop(peer.peer_index, None) is None:
+            return
+        logger.warning("Lost link to worker %d", peer.peer_index)
+        peer.closed = True
+        try:
+            self.selector.unregister(peer.socket)
+        except (KeyError, ValueError):
+            pass
+        try:
+            peer.socket.close()
+        except OSError:
+            pass
+        gone = [cid for cid, info in self.remote_clients.items() if info["worker"] == peer.peer_index]
+        for client_id in gone:
+            del self.remote_clients[client_id]
+            self.broadcast_info(f"{client_id} left the chat.")
+        if gone:
+            self._invalidate_snapshot()
 
     def send_client_list(self, client_id):
         """Send the current client list to the specified client."""
-        snapshot = self._client_list_snapshot()
-        packet = {
-            "type": "client_list",
-            "clients": snapshot
-        }
-        self.send_to_client_id(client_id, packet)
+        state = self.clients.get(client_id)
+        if not state:
+            return
+        if self._client_list_frame is None:
+            packet = {
+                "type": "client_list",
+                "clients": self._client_list_snapshot()
+            }
+            self._client_list_frame = self._encode_frame(packet)
+        self._queue_frame(state, self._client_list_frame)
 
     def _client_list_snapshot(self):
-        """Return a simple list of connected clients for sharing."""
-        with self.lock:
-            return [
-                {"client_id": cid, "address": str(info["address"])}
-                for cid, info in self.clients.items()
+        """Return a simple list of connected clients for sharing (cached until clients changes)."""
+        if self._snapshot is None:
+            snapshot = [
+                {"client_id": cid, "address": str(state.address)}
+                for cid, state in self.clients.items()
             ]
+            if self.remote_clients:
+                snapshot.extend(
+                    {"client_id": cid, "address": info["address"]}
+                    for cid, info in self.remote_clients.items()
+                )
+                # IDs are allocated in connection order across workers
+                snapshot.sort(key=lambda c: int(c["client_id"][1:]))
+            self._snapshot = snapshot
+        return self._snapshot
+
+    def _invalidate_snapshot(self):
+        """Drop cached client list data after a join or leave."""
+        self._snapshot = None
+        self._client_list_frame = None
 
     def broadcast_info(self, text, exclude_id=None):
         """Send an info message to all clients (except possibly one)."""
         packet = {
             "type": "info",
             "text": text,
-            "timestamp": time.time(),
+            "timestamp_ns": time.monotonic_ns(),
         }
-        with self.lock:
-            for cid, info in self.clients.items():
-                if cid == exclude_id:
-                    continue
-                try:
-                    self.send_json(info["socket"], packet)
-                except OSError:
-                    pass
+        # Encode once for every target; queuing never waits on a slow peer
+        frame = self._encode_frame(packet)
+        targets = [state for cid, state in self.clients.items() if cid != exclude_id]
+        for state in targets:
+            self._queue_frame(state, frame)
 
     def send_info(self, client_id, text):
         """Send an info message to a single client."""
         packet = {
             "type": "info",
             "text": text,
-            "timestamp": time.time(),
+            "timestamp_ns": time.monotonic_ns(),
         }
         self.send_to_client_id(client_id, packet)
 
     def send_error(self, client_id, text):
         """Send an error message to a single client."""
-        packet = {
-            "type": "error",
-            "text": text,
-            "timestamp": time.time(),
-        }
-        self.send_to_client_id(client_id, packet)
+        self.send_to_client_id(client_id, self._error_packet(text))
 
     def send_to_client_id(self, client_id, packet):
         """Send a JSON packet to a client by ID."""
-        with self.lock:
-            info = self.clients.get(client_id)
-        if not info:
+        state = self.clients.get(client_id)
+        if not state:
             return
-        try:
-            self.send_json(info["socket"], packet)
-        except OSError:
-            pass
+        self.send_json(state, packet)
+
+    def send_json(self, state, obj):
+        """Queue a JSON object behind its length header."""
+        payload = _encode_json(obj)
+        # Header and payload stay separate buffers; _flush gathers them
+        self._queue_frame(state, HEADER.pack(len(payload)), payload)
 
     @staticmethod
-    def send_json(sock, obj):
-        """Send a JSON object followed by DELIMITER."""
-        data = json.dumps(obj) + DELIMITER
-        sock.sendall(data.encode(ENCODING))
+    def _encode_frame(obj):
+        """Return a complete frame as one buffer, for packets queued to many clients."""
+        payload = _encode_json(obj)
+        return HEADER.pack(len(payload)) + payload
+
+    def _queue_frame(self, state, *buffers):
+        """Queue already-encoded bytes; they are sent at the end of the tick."""
+        if state.closed:
+            return
+        state.out_queue.extend(buffers)
+        self._pending_flush[state] = None
 
     def remove_client(self, client_id):
         """Remove client from registry and notify others."""
-        with self.lock:
-            info = self.clients.pop(client_id, None)
-        if info:
+        state = self.clients.pop(client_id, None)
+        if state:
+            self._invalidate_snapshot()
+            # Best-effort flush so a final reply (e.g. "Goodbye!") isn't lost
+            self._flush(state)
+            state.closed = True
+            try:
+                self.selector.unregister(state.socket)
+            except (KeyError, ValueError):
+                pass
             try:
-                info["socket"].close()
+                state.socket.close()
             except OSError:
                 pass
-            print(f"[SERVER] Client {client_id} disconnected.")
+            logger.info("Client %s disconnected.", client_id)
             self.broadcast_info(f"{client_id} left the chat.", exclude_id=client_id)
+            self._notify_peers({"type": "peer_leave", "client_id": client_id})
 
 
 if __name__ == "__main__":
-    server = ChatServer(host="127.0.0.1", port=5555)
+    # Optional argument: number of worker processes (default 1)
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    server = ChatServer(host="127.0.0.1", port=5555, workers=workers)
     server.start()